@@ -1,19 +1,75 @@
 # frontend/dashboard.py
-import json
 import os
+import orjson
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 
 st.set_page_config("Movie Intelligence", "🎬", layout="wide")
 
+DATA_FILE = "latest_intelligence.json"
+COMMENTS_FILE = "comments.parquet"
+
+@st.cache_data
+def load_data(mtime, comments_mtime):
+    # mtimes are only the cache key, a new backend run invalidates the cache
+    with open(DATA_FILE, "rb") as f:
+        data = orjson.loads(f.read())
+    data["_comments_df"] = pd.read_parquet(COMMENTS_FILE)
+    return data
+
+# ================= FIGURES =================
+# Figures are cached on small tuples of aggregate rows. cache_resource hands
+# back the same Figure object on every rerun instead of unpickling a copy.
+
+def stat_rows(stats):
+    return tuple((k, v["total"], v["negative"]) for k, v in stats.items())
+
+@st.cache_resource
+def stage_figure(rows):
+    df = pd.DataFrame(rows, columns=["Stage", "Total", "Negative"])
+    return px.bar(df, x="Stage", y=["Total", "Negative"], barmode="group")
+
+@st.cache_resource
+def song_figure(rows):
+    df = pd.DataFrame(rows, columns=["Song", "Total", "Negative"])
+    df = df.sort_values("Negative", ascending=False)
+
+    fig = px.bar(
+        df,
+        x="Song",
+        y="Negative",
+        title="Negative Comments per Song"
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+    return fig
+
+@st.cache_resource
+def spike_figure(items):
+    spike_df = pd.DataFrame(
+        sorted(items),
+        columns=["Time", "Negative"]
+    )
+    spike_df["Time"] = pd.to_datetime(spike_df["Time"])
+
+    return px.line(
+        spike_df,
+        x="Time",
+        y="Negative",
+        markers=True
+    )
+
+@st.cache_resource
+def language_figure(rows):
+    df = pd.DataFrame(rows, columns=["Language", "Total", "Negative"])
+    return px.bar(df, x="Language", y="Negative")
+
 # ================= LOAD DATA =================
-if not os.path.exists("latest_intelligence.json"):
+if not os.path.exists(DATA_FILE) or not os.path.exists(COMMENTS_FILE):
     st.error("❌ No intelligence data found yet. Run backend first.")
     st.stop()
 
-with open("latest_intelligence.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+data = load_data(os.path.getmtime(DATA_FILE), os.path.getmtime(COMMENTS_FILE))
 
 # ================= HEADER =================
 st.title(f"🎬 {data.get('movie')} — Intelligence Dashboard")
@@ -24,20 +80,24 @@ st.caption(
 
 st.divider()
 
+# Each section below is an st.fragment, so interacting with one chart or
+# table reruns only that section instead of the whole script
+
 # ================= RECENT NEGATIVE COMMENTS =================
-st.subheader("🚨 Recent Negative Comments (Flagged)")
-
-recent_negatives = data.get("recent_negative_comments", [])
-if recent_negatives:
-    df_recent = pd.DataFrame(recent_negatives)
-    st.dataframe(
-        df_recent[
-            ["author", "comment", "video_title", "video_type", "video_url", "published_at"]
-        ],
-        use_container_width=True
-    )
-else:
-    st.success("✅ No recent negative comments")
+@st.fragment
+def render_recent_negatives(recent_negatives):
+    st.subheader("🚨 Recent Negative Comments (Flagged)")
+
+    if recent_negatives:
+        df_recent = pd.DataFrame.from_records(
+            recent_negatives,
+            columns=["author", "comment", "video_title", "video_type", "video_url", "published_at"]
+        )
+        st.dataframe(df_recent, use_container_width=True)
+    else:
+        st.success("✅ No recent negative comments")
+
+render_recent_negatives(data.get("recent_negative_comments", []))
 
 st.divider()
 
@@ -51,88 +111,76 @@ k3.metric("Attackers", len(data.get("attack_coordination", [])))
 st.divider()
 
 # ================= STAGE SENTIMENT =================
-st.subheader("🎥 Sentiment by Movie Stage")
+@st.fragment
+def render_stage_chart(stage):
+    st.subheader("🎥 Sentiment by Movie Stage")
+
+    if stage:
+        st.plotly_chart(stage_figure(stat_rows(stage)), use_container_width=True)
 
-stage = data.get("sentiment_by_stage", {})
-if stage:
-    df = pd.DataFrame.from_dict(stage, orient="index").reset_index()
-    df.columns = ["Stage", "Total", "Negative"]
-    fig = px.bar(df, x="Stage", y=["Total", "Negative"], barmode="group")
-    st.plotly_chart(fig, use_container_width=True)
+render_stage_chart(data.get("sentiment_by_stage", {}))
 
 # ================= SONG BAR GRAPH =================
-st.subheader("🎵 Song-wise Negative Sentiment")
+@st.fragment
+def render_song_chart(songs):
+    st.subheader("🎵 Song-wise Negative Sentiment")
 
-songs = data.get("song_analysis", {})
-if songs:
-    df = pd.DataFrame.from_dict(songs, orient="index").reset_index()
-    df.columns = ["Song", "Total", "Negative"]
-    df = df.sort_values("Negative", ascending=False)
+    if songs:
+        st.plotly_chart(song_figure(stat_rows(songs)), use_container_width=True)
 
-    fig = px.bar(
-        df,
-        x="Song",
-        y="Negative",
-        title="Negative Comments per Song"
-    )
-    fig.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+render_song_chart(data.get("song_analysis", {}))
 
 st.divider()
 
 # ================= NEGATIVE SPIKE LINE GRAPH =================
-st.subheader("📉 Negative Comment Spike Timeline")
+@st.fragment
+def render_spike_chart(spikes):
+    st.subheader("📉 Negative Comment Spike Timeline")
 
-spikes = data.get("negative_spikes", {})
-if spikes:
-    spike_df = pd.DataFrame(
-        sorted(spikes.items()),
-        columns=["Time", "Negative"]
-    )
-    spike_df["Time"] = pd.to_datetime(spike_df["Time"])
+    if spikes:
+        st.plotly_chart(spike_figure(tuple(spikes.items())), use_container_width=True)
 
-    fig = px.line(
-        spike_df,
-        x="Time",
-        y="Negative",
-        markers=True
-    )
-    st.plotly_chart(fig, use_container_width=True)
+render_spike_chart(data.get("negative_spikes", {}))
 
 st.divider()
 
 # ================= LANGUAGE =================
-st.subheader("🌐 Language Distribution")
+@st.fragment
+def render_language_chart(lang):
+    st.subheader("🌐 Language Distribution")
 
-lang = data.get("language_distribution", {})
-if lang:
-    df = pd.DataFrame.from_dict(lang, orient="index").reset_index()
-    df.columns = ["Language", "Total", "Negative"]
-    fig = px.bar(df, x="Language", y="Negative")
-    st.plotly_chart(fig, use_container_width=True)
+    if lang:
+        st.plotly_chart(language_figure(stat_rows(lang)), use_container_width=True)
+
+render_language_chart(data.get("language_distribution", {}))
 
 st.divider()
 
 # ================= ATTACK USERS =================
-st.subheader("🚨 Coordinated Attack Users")
+@st.fragment
+def render_attackers(attackers):
+    st.subheader("🚨 Coordinated Attack Users")
+
+    if attackers:
+        st.dataframe(pd.DataFrame(attackers), use_container_width=True)
+    else:
+        st.success("✅ No coordinated attacks detected")
 
-attackers = data.get("attack_coordination", [])
-if attackers:
-    st.dataframe(pd.DataFrame(attackers), use_container_width=True)
-else:
-    st.success("✅ No coordinated attacks detected")
+render_attackers(data.get("attack_coordination", []))
 
 st.divider()
 
 # ================= COMMENTS =================
-st.subheader("🧾 Comment Evidence")
-
-comments = data.get("comments", [])
-if comments:
-    df = pd.DataFrame(comments)
-    st.dataframe(
-        df[
-            ["author", "sentiment", "language", "video_type", "video_title", "comment"]
-        ],
-        use_container_width=True
-    )
+@st.fragment
+def render_comments(df):
+    st.subheader("🧾 Comment Evidence")
+
+    if not df.empty:
+        st.dataframe(
+            df[
+                ["author", "sentiment", "language", "video_type", "video_title", "comment"]
+            ],
+            use_container_width=True
+        )
+
+render_comments(data["_comments_df"])
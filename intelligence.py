@@ -5,15 +5,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -22,11 +33,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -46,24 +98,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -81,7 +303,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -107,131 +329,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -245,15 +573,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -262,11 +601,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -286,24 +666,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -321,7 +871,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -347,131 +897,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -485,15 +1141,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -502,11 +1169,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -526,24 +1234,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -561,7 +1439,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -587,131 +1465,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -725,15 +1709,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -742,11 +1737,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -766,24 +1802,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -801,7 +2007,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -827,131 +2033,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -965,15 +2277,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -982,11 +2305,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -1006,24 +2370,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -1041,7 +2575,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -1067,131 +2601,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -1205,15 +2845,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -1222,11 +2873,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -1246,24 +2938,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -1281,7 +3143,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -1307,131 +3169,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -1445,15 +3413,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -1462,11 +3441,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -1486,24 +3506,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -1521,7 +3711,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -1547,131 +3737,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 
@@ -1685,15 +3981,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import re
+import sqlite3
 import time
-import json
-from collections import defaultdict, Counter
-from datetime import datetime
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.client import HTTPException
+
+import httplib2
+import torch
 from googleapiclient.discovery import build
-from transformers import pipeline
-from langdetect import detect
-from tqdm import tqdm
+from googleapiclient.errors import Error as GoogleApiError
+from googleapiclient.http import build_http
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import ahocorasick
+import fasttext
+import orjson
+import pandas as pd
 
 # ================= CONFIG =================
 
@@ -1702,11 +4009,52 @@ if not YOUTUBE_API_KEY:
     raise RuntimeError("YOUTUBE_API_KEY missing in .env")
 
 SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis"
+# Larger batches keep a GPU busy; on CPU smaller ones waste less padding
+SENTIMENT_BATCH_SIZE = 128 if torch.cuda.is_available() else 32
+SENTIMENT_MAX_TOKENS = 512
+# On GPU the fastest of these is picked once per process on a sample of comments
+SENTIMENT_BATCH_CANDIDATES = (32, 64, 128, 256)
+BATCH_TUNING_SAMPLE = 256
+# Optional ONNX export of SENTIMENT_MODEL, used instead of PyTorch when present:
+# optimum-cli export onnx --model tabularisai/multilingual-sentiment-analysis --task text-classification sent_onnx
+SENTIMENT_ONNX_DIR = "sent_onnx"
+# Optional dynamic INT8 quantization of that export, preferred on CPU:
+# optimum-cli onnxruntime quantize --onnx_model sent_onnx --avx512_vnni -o sent_onnx_int8
+SENTIMENT_ONNX_INT8_DIR = "sent_onnx_int8"
+# fastText language ID model, download from
+# https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz
+LID_MODEL_PATH = "lid.176.ftz"
+LANGUAGE_NAMES = {"__label__te": "Telugu", "__label__en": "English", "__label__hi": "Hindi"}
+LANGUAGE_CACHE_SIZE = 200_000  # Detected texts remembered across runs
 
 MAX_VIDEOS = 300
 MAX_COMMENTS = 100
 REPEAT_USER_THRESHOLD = 3
 RECENT_NEGATIVE_COUNT = 5  # Number of recent negatives to flag
+COMMENTS_FILE = "comments.parquet"  # Full comment table, aggregates stay in JSON
+# comment id -> sentiment / language from earlier runs, so only new or edited
+# comments reach the models. Delete it after changing SENTIMENT_MODEL,
+# LID_MODEL_PATH, TRIVIAL_SENTIMENT or is_trivial_comment().
+LABEL_CACHE_DB = "intel_cache.db"
+LABEL_CACHE_QUERY_CHUNK = 900  # Ids per lookup, under SQLite's parameter limit
+COMMENT_COLUMNS = [
+    "author", "sentiment", "language", "video_type",
+    "video_title", "comment", "video_url", "published_at"
+]
+# Per-video fields repeat on every comment of that video, so they are stored
+# as categories too (int codes plus one copy of each string)
+CATEGORY_COLUMNS = ["sentiment", "language", "video_type", "video_title", "video_url"]
+FETCH_WORKERS = 16
+SENTIMENT_STREAM_CHUNK = 1024  # New distinct texts scored while fetching continues
+# Empty, link-only and emoji-only comments carry no opinion the model can
+# read, so they skip inference. Aggregates only count "Negative", so these
+# never inflate the negative numbers.
+TRIVIAL_SENTIMENT = "Neutral"
+API_RETRIES = 3  # Retries on 429 / 5xx, with exponential backoff
+HTTP_TIMEOUT = 10  # Seconds per API request
+# Stop paging a video's comments once they are older than this, e.g. 72 for
+# hourly refreshes. None drains every page (full sweep).
+COMMENT_MAX_AGE_HOURS = None
 
 MOVIE_NAME = "Shiva Shankara Vara Prasad"
 HERO = "Chiranjeevi"
@@ -1726,24 +4074,194 @@ VIDEO_CLASSIFIERS = {
 def normalize_sentiment(label):
     return "Positive" if "pos" in label.lower() else "Negative"
 
+def build_keyword_automaton(classifiers):
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(classifiers.items()):
+        for kw in keywords:
+            automaton.add_word(kw, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+VIDEO_AUTOMATON = build_keyword_automaton(VIDEO_CLASSIFIERS)
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w")
+
+def is_trivial_comment(text):
+    # Nothing but links, emoji, punctuation and whitespace. Short words still
+    # count: a single Telugu or Hindi word can be one or two code points.
+    return not _WORD_RE.search(_URL_RE.sub("", text))
+
 def classify_video(title):
-    t = title.lower()
-    for k, v in VIDEO_CLASSIFIERS.items():
-        if any(x in t for x in v):
-            return k
-    return "Other"
-
-def normalize_language(text):
-    if not text.strip():
-        return "Unknown"
-    try:
-        lang = detect(text)
-        return {"te": "Telugu", "en": "English", "hi": "Hindi"}.get(lang, "Mixed / Roman")
-    except:
-        return "Unknown"
+    # Single pass over the lowercased title; the earliest category in
+    # VIDEO_CLASSIFIERS wins, as with the old in-order keyword scan
+    matches = [m for _, m in VIDEO_AUTOMATON.iter(title.lower())]
+    return min(matches)[1] if matches else "Other"
+
+@lru_cache(maxsize=1)
+def get_lid_model():
+    return fasttext.load_model(LID_MODEL_PATH)
+
+_language_cache = {}
+
+def normalize_language(texts):
+    # Texts seen before (also in earlier runs) come from the cache, the rest
+    # are detected in one fastText call. Blank texts stay "Unknown".
+    missing = [t for t in dict.fromkeys(texts) if t not in _language_cache]
+
+    if missing:
+        cleaned = [(t or "").replace("\n", " ").strip() for t in missing]
+        labels, _ = get_lid_model().predict(cleaned, k=1)
+
+        if len(_language_cache) + len(missing) > LANGUAGE_CACHE_SIZE:
+            _language_cache.clear()
+        _language_cache.update(
+            (t, LANGUAGE_NAMES.get(label[0], "Mixed / Roman") if text and label else "Unknown")
+            for t, text, label in zip(missing, cleaned, labels)
+        )
+
+    return [_language_cache[t] for t in texts]
+
+_thread_local = threading.local()
 
 def get_youtube():
-    return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    # httplib2 is not thread-safe, so every thread gets its own client.
+    # build_http() is what build() uses by default; only its 60s timeout is
+    # lowered, so a stalled request fails fast and is retried. static_discovery
+    # uses the discovery document bundled with the client instead of
+    # downloading it on every build.
+    if not hasattr(_thread_local, "youtube"):
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+        _thread_local.youtube = build(
+            "youtube",
+            "v3",
+            developerKey=YOUTUBE_API_KEY,
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        )
+    return _thread_local.youtube
+
+@lru_cache(maxsize=1)
+def load_sentiment():
+    # Returns (tokenizer, model). FP16 on GPU, dynamic INT8 linear layers on
+    # CPU. Cached so repeated run_intelligence() calls reuse the loaded model.
+    # On GPU the ONNX export is only used when onnxruntime-gpu is installed;
+    # the default CPU-only onnxruntime keeps the FP16 PyTorch model.
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL, use_fast=True)
+
+    if torch.cuda.is_available():
+        if os.path.isdir(SENTIMENT_ONNX_DIR) and onnx_provider_available("CUDAExecutionProvider"):
+            return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR, provider="CUDAExecutionProvider")
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL, torch_dtype=torch.float16
+        ).to("cuda")
+        return tokenizer, model.eval()
+
+    if os.path.isdir(SENTIMENT_ONNX_INT8_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_INT8_DIR, "model_quantized.onnx")
+
+    if os.path.isdir(SENTIMENT_ONNX_DIR):
+        return tokenizer, load_onnx_sentiment(SENTIMENT_ONNX_DIR)
+
+    use_cpu_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return tokenizer, model.eval()
+
+def use_cpu_threads():
+    # For PyTorch CPU inference: every CPU this process may run on goes to the
+    # intra-op (matmul) pool. The fetch threads are I/O bound and nothing else
+    # runs torch ops concurrently, so one inter-op thread is enough.
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    torch.set_num_threads(cpus)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once per process
+
+def onnx_provider_available(provider):
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+    return provider in onnxruntime.get_available_providers()
+
+def load_onnx_sentiment(model_dir, file_name="model.onnx", provider="CPUExecutionProvider"):
+    # ONNX Runtime with all graph optimizations (fused attention, LayerNorm,
+    # GeLU) on the given execution provider
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider, session_options=options
+    )
+
+def predict_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    # "Positive" / "Negative" for texts, one forward pass per batch_size
+    # texts. Each batch is padded only to its own longest sequence.
+    tokenizer, model = load_sentiment()
+    # Normalize each of the model's labels once, not once per text
+    sentiments = {i: normalize_sentiment(label) for i, label in model.config.id2label.items()}
+    # Tokenize everything in one call so the fast (Rust) tokenizer encodes
+    # across all cores, then batch texts of similar token length together so
+    # little of each batch is padding, and put the labels back in input order
+    encodings = tokenizer(list(texts), truncation=True, max_length=SENTIMENT_MAX_TOKENS)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+    labels = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer.pad(
+                {key: [values[i] for i in batch] for key, values in encodings.items()},
+                return_tensors="pt"
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(-1).tolist()
+            for i, p in zip(batch, predictions):
+                labels[i] = sentiments[p]
+
+    return labels
+
+_optimal_batch_size = None
+
+def sentiment_batch_size(texts):
+    # On GPU, time every candidate on a sample of the real comments (2 warmup
+    # + 3 timed passes) the first time, then keep the fastest for the process.
+    # Sizes that run out of GPU memory are skipped.
+    global _optimal_batch_size
+    if not torch.cuda.is_available() or len(texts) < BATCH_TUNING_SAMPLE:
+        return SENTIMENT_BATCH_SIZE
+
+    if _optimal_batch_size is None:
+        sample = texts[:BATCH_TUNING_SAMPLE]
+        timings = {}
+        for batch_size in SENTIMENT_BATCH_CANDIDATES:
+            try:
+                for _ in range(2):
+                    predict_sentiment(sample, batch_size)
+                start = time.perf_counter()
+                for _ in range(3):
+                    predict_sentiment(sample, batch_size)
+            except torch.cuda.OutOfMemoryError:
+                torch.cuda.empty_cache()
+                continue
+            timings[batch_size] = time.perf_counter() - start
+        _optimal_batch_size = (
+            min(timings, key=timings.get) if timings else min(SENTIMENT_BATCH_CANDIDATES)
+        )
+        print(f"Sentiment batch size: {_optimal_batch_size}")
+
+    return _optimal_batch_size
 
 # ================= VIDEO SEARCH =================
 
@@ -1761,7 +4279,7 @@ def search_movie_videos(youtube):
     )
 
     while request and len(videos) < MAX_VIDEOS:
-        response = request.execute()
+        response = request.execute(num_retries=API_RETRIES)
 
         for item in response.get("items", []):
             # Skip live videos to avoid comment fetch errors
@@ -1787,131 +4305,237 @@ def search_movie_videos(youtube):
 
 # ================= COMMENTS =================
 
+def comment_cutoff():
+    # ISO timestamp in YouTube's format, so it compares as a plain string
+    if not COMMENT_MAX_AGE_HOURS:
+        return None
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=COMMENT_MAX_AGE_HOURS)
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def fetch_comments(youtube, video):
-    comments = []
+    cutoff = comment_cutoff()
     try:
         request = youtube.commentThreads().list(
             part="snippet",
             videoId=video["video_id"],
             maxResults=MAX_COMMENTS,
+            order="time",
             textFormat="plainText"
         )
 
         while request:
-            response = request.execute()
+            response = request.execute(num_retries=API_RETRIES)
+            reached_cutoff = False
             for item in response.get("items", []):
                 s = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({
+                # Newest first, so everything after this is older too
+                if cutoff and (s.get("publishedAt") or "") < cutoff:
+                    reached_cutoff = True
+                    break
+                yield {
+                    "comment_id": item["id"],
+                    "updated_at": s.get("updatedAt"),
                     "author": s.get("authorDisplayName"),
                     "comment": s.get("textDisplay"),
                     "published_at": s.get("publishedAt"),
                     "video_title": video["video_title"],
                     "video_type": video["video_type"],
                     "video_url": video["video_url"]
-                })
+                }
 
+            if reached_cutoff:
+                break
             request = youtube.commentThreads().list_next(request, response)
 
-    except Exception as e:
-        # Friendly logging for errors / disabled comments
+    except (GoogleApiError, httplib2.HttpLib2Error, HTTPException, OSError, ValueError) as e:
+        # Friendly logging for API / network errors (including truncated
+        # responses and bodies that are not valid JSON) and disabled comments.
+        # One bad video is skipped; anything else is a bug and should not be
+        # swallowed.
         if "commentsDisabled" in str(e):
             print(f"⚠ Comments disabled for video: {video['video_title']}")
         else:
             print(f"❌ Failed to fetch comments for {video['video_title']}: {e}")
 
-    return comments
+def fetch_video_comments(video):
+    # Thread pool worker, drains one video with the thread's own client
+    return list(fetch_comments(get_youtube(), video))
+
+# ================= LABEL CACHE =================
+
+def connect_label_cache():
+    # One connection per run, shared by every lookup and the final save
+    con = sqlite3.connect(LABEL_CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS labels "
+        "(id TEXT PRIMARY KEY, updated_at TEXT, sentiment TEXT, language TEXT)"
+    )
+    return con
+
+def lookup_label_cache(con, comment_ids):
+    # {comment_id: (updated_at, sentiment, language)} for the given ids only,
+    # so a run costs O(comments fetched), not O(every comment ever cached)
+    found = {}
+    for start in range(0, len(comment_ids), LABEL_CACHE_QUERY_CHUNK):
+        chunk = comment_ids[start:start + LABEL_CACHE_QUERY_CHUNK]
+        rows = con.execute(
+            "SELECT id, updated_at, sentiment, language FROM labels "
+            f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update((row[0], row[1:]) for row in rows)
+    return found
+
+def save_label_cache(con, rows):
+    # rows: (comment_id, updated_at, sentiment, language)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)", rows)
+
+# ================= AGGREGATES =================
+
+def sentiment_breakdown(df, key):
+    # {value: {"total": n, "negative": n}} for every value of the key column
+    counts = df.groupby(key, sort=False, observed=True)["is_negative"].agg(["size", "sum"])
+    return {
+        k: {"total": int(total), "negative": int(negative)}
+        for k, (total, negative) in zip(counts.index, counts.to_numpy())
+    }
 
 # ================= MAIN ENGINE =================
 
 def run_intelligence():
     youtube = get_youtube()
-    sentiment_model = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
 
     videos = search_movie_videos(youtube)
 
+    # Comment fetching is I/O bound, so the pool keeps fetching while the
+    # main thread scores the videos already fetched. Each distinct text
+    # ("first", emojis, ...) is scored once, in batches of new texts every
+    # SENTIMENT_STREAM_CHUNK. Full texts go to the model; the tokenizer
+    # truncates at SENTIMENT_MAX_TOKENS tokens, not characters. Trivial
+    # texts are labelled up front and never reach the model or fastText,
+    # and neither do comments labelled by an earlier run and not edited since.
+    cached = {}
     all_comments = []
-    for v in videos:
-        all_comments.extend(fetch_comments(youtube, v))
-
-    results = []
-    user_map = defaultdict(list)
-    stage_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    language_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    song_stats = defaultdict(lambda: {"total": 0, "negative": 0})
-    spikes = Counter()
-
-    for c in tqdm(all_comments, desc="Analyzing"):
-        try:
-            out = sentiment_model(c["comment"][:512])[0]
-            sentiment = normalize_sentiment(out["label"])
-            language = normalize_language(c["comment"])
-
-            hour = datetime.fromisoformat(
-                c["published_at"].replace("Z", "+00:00")
-            ).strftime("%Y-%m-%d %H:00")
-
-            row = {**c, "sentiment": sentiment, "language": language}
-            results.append(row)
-            user_map[c["author"]].append(row)
-
-            stage_stats[c["video_type"]]["total"] += 1
-            language_stats[language]["total"] += 1
-
-            if sentiment == "Negative":
-                stage_stats[c["video_type"]]["negative"] += 1
-                language_stats[language]["negative"] += 1
-                spikes[hour] += 1
-
-                if c["video_type"] == "Song":
-                    song_stats[c["video_title"]]["negative"] += 1
-
-            if c["video_type"] == "Song":
-                song_stats[c["video_title"]]["total"] += 1
-
-        except Exception as e:
-            print(f"Error analyzing comment: {e}")
-            pass
+    sentiment_by_text = {}
+    language_by_text = {}
+    pending = {}  # Distinct unscored texts, in arrival order
+
+    with (
+        closing(connect_label_cache()) as label_cache,
+        ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex
+    ):
+        futures = [ex.submit(fetch_video_comments, v) for v in videos]
+
+        for i, future in enumerate(futures):
+            comments = future.result()
+            all_comments.extend(comments)
+            cached.update(lookup_label_cache(label_cache, [c["comment_id"] for c in comments]))
+            for c in comments:
+                text = c["comment"] or ""
+                if text in sentiment_by_text:
+                    continue
+                hit = cached.get(c["comment_id"])
+                if hit and hit[0] == c["updated_at"]:
+                    sentiment_by_text[text], language_by_text[text] = hit[1:]
+                elif is_trivial_comment(text):
+                    sentiment_by_text[text] = TRIVIAL_SENTIMENT
+                    language_by_text[text] = "Unknown"
+                else:
+                    pending[text] = None
+
+            if pending and (len(pending) >= SENTIMENT_STREAM_CHUNK or i == len(futures) - 1):
+                texts = list(pending)
+                sentiment_by_text.update(
+                    zip(texts, predict_sentiment(texts, sentiment_batch_size(texts)))
+                )
+                pending.clear()
+
+        unique_texts = [t for t in sentiment_by_text if t not in language_by_text]
+        language_by_text.update(zip(unique_texts, normalize_language(unique_texts)))
+
+        new_labels = []
+        for c in all_comments:
+            if cached.get(c["comment_id"], (None,))[0] != c["updated_at"]:
+                text = c["comment"] or ""
+                new_labels.append(
+                    (c["comment_id"], c["updated_at"], sentiment_by_text[text], language_by_text[text])
+                )
+        save_label_cache(label_cache, new_labels)
+
+    # ----------------- STAGE / LANGUAGE / SONG / SPIKES -----------------
+    # Labels are looked up per distinct text straight into columns; the
+    # comment dicts are never touched again
+    comments_df = pd.DataFrame.from_records(all_comments, columns=COMMENT_COLUMNS)
+    texts = comments_df["comment"].fillna("")
+    comments_df["sentiment"] = texts.map(sentiment_by_text)
+    comments_df["language"] = texts.map(language_by_text)
+    comments_df = comments_df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    comments_df["is_negative"] = comments_df["sentiment"].eq("Negative")
+    # YouTube timestamps are always "YYYY-MM-DDTHH:MM:SSZ", so the hour
+    # bucket is a slice; missing timestamps stay NaN and drop out of spikes
+    published = comments_df["published_at"].str
+    comments_df["hour"] = published[:10] + " " + published[11:13] + ":00"
+
+    stage_stats = sentiment_breakdown(comments_df, "video_type")
+    language_stats = sentiment_breakdown(comments_df, "language")
+    song_stats = sentiment_breakdown(
+        comments_df.loc[comments_df["video_type"] == "Song", ["video_title", "is_negative"]],
+        "video_title"
+    )
+    negative_df = comments_df[comments_df["is_negative"]]
+    spikes = negative_df["hour"].value_counts(sort=False)
 
     # ----------------- RECENT NEGATIVE COMMENTS -----------------
-    sorted_negatives = sorted(
-        [c for c in results if c["sentiment"] == "Negative"],
-        key=lambda x: x["published_at"],
-        reverse=True
+    # ISO timestamps sort chronologically as strings
+    recent_negative_comments = (
+        negative_df.sort_values("published_at", ascending=False, kind="stable")
+        .head(RECENT_NEGATIVE_COUNT)[COMMENT_COLUMNS]
+        .to_dict("records")
     )
-    recent_negative_comments = sorted_negatives[:RECENT_NEGATIVE_COUNT]
 
     # ----------------- ATTACK COORDINATION -----------------
+    # Negative counts for every author are a cheap sum; the per-author stage
+    # sets are only built for the few authors over the threshold
+    negatives_by_user = comments_df.groupby("author", sort=False)["is_negative"].sum()
+    attackers = negatives_by_user[negatives_by_user >= REPEAT_USER_THRESHOLD]
+    stages_by_user = (
+        comments_df.loc[comments_df["author"].isin(attackers.index), ["author", "video_type"]]
+        .groupby("author", sort=False)["video_type"]
+        .unique()
+    )
     attack_users = [
         {
             "author": u,
-            "negative_comments": sum(1 for r in rows if r["sentiment"] == "Negative"),
-            "stages_targeted": list(set(r["video_type"] for r in rows))
+            "negative_comments": int(n),
+            "stages_targeted": list(stages_by_user[u])
         }
-        for u, rows in user_map.items()
-        if sum(1 for r in rows if r["sentiment"] == "Negative") >= REPEAT_USER_THRESHOLD
+        for u, n in attackers.items()
     ]
 
     # ----------------- FINAL OUTPUT -----------------
     output = {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": datetime.now(timezone.utc),
         "movie": MOVIE_NAME,
         "hero": HERO,
         "director": DIRECTOR,
         "recent_negative_comments": recent_negative_comments,  # FLAGGED RECENT NEGATIVES
         "instances": {
-            "total_mentions": len(results),
-            "negative_mentions": sum(1 for r in results if r["sentiment"] == "Negative")
+            "total_mentions": len(comments_df),
+            "negative_mentions": len(negative_df)
         },
         "sentiment_by_stage": stage_stats,
         "language_distribution": language_stats,
         "song_analysis": song_stats,
-        "negative_spikes": dict(spikes),
-        "attack_coordination": attack_users,
-        "comments": results
+        "negative_spikes": {hour: int(n) for hour, n in spikes.items()},
+        "attack_coordination": attack_users
     }
 
-    with open("latest_intelligence.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    comments_df[COMMENT_COLUMNS].to_parquet(COMMENTS_FILE, compression="zstd")
+
+    # Compact output; pretty-print on demand with `python -m json.tool`
+    with open("latest_intelligence.json", "wb") as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z))
 
     return output
 